@@ -0,0 +1,275 @@
+"""Tests for toml_redactor. Run with: python3 -m unittest test_toml_redactor"""
+
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import toml_redactor
+from toml_redactor import TOMLRedactor
+
+
+class LeadingWhitespaceTest(unittest.TestCase):
+    """Keys and comments indented with any Unicode whitespace."""
+
+    INDENTS = ['', ' ', '\t', ' \t', '\xa0', '　', '\x85', '\x1c', ' \xa0\t']
+
+    def test_indented_keys_are_redacted(self):
+        for indent in self.INDENTS:
+            with self.subTest(indent=indent):
+                redactor = TOMLRedactor()
+                line = f'{indent}password = "hunter2"\n'
+                self.assertEqual(redactor.redact_line(line, 1),
+                                 f'{indent}password = "***REDACTED***"\n')
+                self.assertEqual(redactor.redacted_lines, [1])
+
+    def test_indented_comments_are_removed(self):
+        for indent in self.INDENTS:
+            with self.subTest(indent=indent):
+                redactor = TOMLRedactor(remove_comments=True)
+                self.assertEqual(redactor.redact_line(f'{indent}# note\n', 1), '')
+
+    def test_redact_file_handles_indents(self):
+        lines = [f'{indent}password = "hunter2"\n{indent}# note\n' for indent in self.INDENTS]
+        expected = ''.join(f'{indent}password = "***REDACTED***"\n' for indent in self.INDENTS)
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = Path(tmp, 'in.toml')
+            output_path = Path(tmp, 'out.toml')
+            input_path.write_text(''.join(lines), encoding='utf-8')
+            redactor = TOMLRedactor(remove_comments=True)
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertTrue(redactor.redact_file(input_path, output_path))
+            self.assertEqual(output_path.read_text(encoding='utf-8'), expected)
+        self.assertEqual(redactor.redacted_lines, list(range(1, 2 * len(self.INDENTS), 2)))
+
+    def test_whitespace_only_lines_are_kept(self):
+        redactor = TOMLRedactor(remove_comments=True)
+        for line in ['\n', '  \n', '\xa0\n', '']:
+            with self.subTest(line=line):
+                self.assertEqual(redactor.redact_line(line, 1), line)
+
+
+class RedactLineTest(unittest.TestCase):
+    """redact_line uses the same classification as redact_file."""
+
+    CASES = [
+        ('password = "hunter2"\n', 'password = "***REDACTED***"\n'),
+        ("admin.password = 'x'\n", "admin.password = '***REDACTED***'\n"),
+        ('properties."moesifKey" = "m"\n', 'properties."moesifKey" = "***REDACTED***"\n'),
+        ('a."secret=1" = "x"\n', 'a."secret=1" = "***REDACTED***"\n'),
+        ('secret = "no newline"', 'secret = "***REDACTED***"\n'),
+        ('password = "${env.PASSWORD}"\n', 'password = "${env.PASSWORD}"\n'),
+        ('token_endpoint = "https://x/token"\n', 'token_endpoint = "https://x/token"\n'),
+        ('password =\n', 'password =\n'),
+        ('[password]\n', '[password]\n'),
+        ('# password = "x"\n', '# password = "x"\n'),
+    ]
+
+    def test_cases(self):
+        for line, expected in self.CASES:
+            with self.subTest(line=line):
+                self.assertEqual(TOMLRedactor().redact_line(line, 1), expected)
+
+    def test_matches_redact_file(self):
+        data = ''.join(line for line, _ in self.CASES)
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = Path(tmp, 'in.toml')
+            input_path.write_text(data, encoding='utf-8')
+            by_file = TOMLRedactor()
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+                self.assertTrue(by_file.redact_file(input_path))
+        by_line = TOMLRedactor()
+        lines = data.splitlines(keepends=True)
+        expected = ''.join(by_line.redact_line(line, n) for n, line in enumerate(lines, start=1))
+        # stdout output ends with the extra newline print() adds
+        self.assertEqual(out.getvalue(), expected + '\n')
+        self.assertEqual(by_file.redacted_lines, by_line.redacted_lines)
+
+
+class LineEndingTest(unittest.TestCase):
+    """redact_file treats LF, CRLF and lone CR as line breaks, like text mode."""
+
+    CASES = {
+        'lf': b'name = "svc"\npassword = "hunter2"\napi_key = "abc"\n',
+        'crlf': b'name = "svc"\r\npassword = "hunter2"\r\napi_key = "abc"\r\n',
+        'cr': b'name = "svc"\rpassword = "hunter2"\rapi_key = "abc"\r',
+        'mixed': b'name = "svc"\rpassword = "hunter2"\r\napi_key = "abc"\n',
+    }
+    EXPECTED = 'name = "svc"\npassword = "***REDACTED***"\napi_key = "***REDACTED***"\n'
+
+    def redact(self, data, buffer_size=toml_redactor._IO_BUFFER_SIZE):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = Path(tmp, 'in.toml')
+            output_path = Path(tmp, 'out.toml')
+            input_path.write_bytes(data)
+            redactor = TOMLRedactor()
+            with mock.patch.object(toml_redactor, '_IO_BUFFER_SIZE', buffer_size), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                self.assertTrue(redactor.redact_file(input_path, output_path))
+            return output_path.read_text(encoding='utf-8'), redactor.redacted_lines
+
+    def test_memory_mapped(self):
+        for name, data in self.CASES.items():
+            for buffer_size in (1, 7, 1 << 20):
+                with self.subTest(endings=name, buffer_size=buffer_size):
+                    self.assertEqual(self.redact(data, buffer_size), (self.EXPECTED, [2, 3]))
+
+    def test_text_mode_fallback(self):
+        with mock.patch.object(toml_redactor.mmap, 'mmap', side_effect=OSError):
+            for name, data in self.CASES.items():
+                for buffer_size in (1, 7, 1 << 20):
+                    with self.subTest(endings=name, buffer_size=buffer_size):
+                        self.assertEqual(self.redact(data, buffer_size),
+                                         (self.EXPECTED, [2, 3]))
+
+    def test_matches_text_mode_line_numbers(self):
+        data = b'a = 1\r\rpassword = "x"\r\n\r\nsecret = "y"\rb = 2'
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, 'in.toml')
+            path.write_bytes(data)
+            with open(path, encoding='utf-8') as f:
+                expected = [n for n, line in enumerate(f, start=1)
+                            if line.startswith(('password', 'secret'))]
+        self.assertEqual(self.redact(data)[1], expected)
+
+
+class OutputFileTest(unittest.TestCase):
+    """redact_file only replaces its output once the whole input was read."""
+
+    def redact(self, input_path, output_path):
+        with contextlib.redirect_stdout(io.StringIO()), \
+                contextlib.redirect_stderr(io.StringIO()):
+            return TOMLRedactor().redact_file(input_path, output_path)
+
+    def test_failed_read_keeps_existing_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = Path(tmp, 'in.toml')
+            output_path = Path(tmp, 'out.toml')
+            input_path.write_bytes(b'password = "x"\n\xff\n')
+            output_path.write_text('previous\n', encoding='utf-8')
+            self.assertFalse(self.redact(input_path, output_path))
+            self.assertEqual(output_path.read_text(encoding='utf-8'), 'previous\n')
+            self.assertEqual(sorted(p.name for p in Path(tmp).iterdir()),
+                             ['in.toml', 'out.toml'])
+
+    def test_in_place(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, 'in.toml')
+            path.write_text('a = 1\npassword = "x"\n' * 100, encoding='utf-8')
+            path.chmod(0o640)
+            with mock.patch.object(toml_redactor, '_IO_BUFFER_SIZE', 64):
+                self.assertTrue(self.redact(path, path))
+            self.assertEqual(path.read_text(encoding='utf-8'),
+                             'a = 1\npassword = "***REDACTED***"\n' * 100)
+            self.assertEqual(path.stat().st_mode & 0o777, 0o640)
+            self.assertEqual([p.name for p in Path(tmp).iterdir()], ['in.toml'])
+
+
+class BatchModeTest(unittest.TestCase):
+    """main() with several input files, run in-process and in a worker pool."""
+
+    JOBS = ['1', '2']
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.first = self.write('a/first.toml', 'name = "a"\npassword = "x"\n')
+        self.second = self.write('b/second.toml', 'api_key = "y"\nport = 8080\n')
+
+    def write(self, name, data):
+        path = self.tmp / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        path.write_bytes(data)
+        return str(path)
+
+    def main(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with mock.patch.object(sys, 'argv', ['toml_redactor.py', *args]), \
+                contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr), \
+                self.assertRaises(SystemExit) as cm:
+            toml_redactor.main()
+        return cm.exception.code, stdout.getvalue(), stderr.getvalue()
+
+    def test_stdout_keeps_input_order(self):
+        for jobs in self.JOBS:
+            with self.subTest(jobs=jobs):
+                code, stdout, stderr = self.main(self.second, self.first, '-j', jobs)
+                self.assertEqual(code, 0)
+                self.assertEqual(stdout, f'# File: {self.second}\n'
+                                         'api_key = "***REDACTED***"\nport = 8080\n\n'
+                                         f'# File: {self.first}\n'
+                                         'name = "a"\npassword = "***REDACTED***"\n\n')
+                self.assertEqual(stderr.count('# Redacted 1 sensitive fields'), 2)
+
+    def test_output_directory_is_created(self):
+        for jobs in self.JOBS:
+            with self.subTest(jobs=jobs):
+                output_dir = self.tmp / f'out{jobs}' / 'nested'
+                code, _, _ = self.main(self.first, self.second, '-o', str(output_dir),
+                                       '-j', jobs)
+                self.assertEqual(code, 0)
+                self.assertEqual(sorted(p.name for p in output_dir.iterdir()),
+                                 ['first.toml', 'second.toml'])
+                self.assertEqual((output_dir / 'first.toml').read_text(encoding='utf-8'),
+                                 'name = "a"\npassword = "***REDACTED***"\n')
+                self.assertEqual((output_dir / 'second.toml').read_text(encoding='utf-8'),
+                                 'api_key = "***REDACTED***"\nport = 8080\n')
+
+    def test_output_must_be_a_directory(self):
+        output = self.write('out.toml', 'previous\n')
+        for jobs in self.JOBS:
+            with self.subTest(jobs=jobs):
+                code, _, stderr = self.main(self.first, self.second, '-o', output, '-j', jobs)
+                self.assertEqual(code, 1)
+                self.assertIn('Output must be a directory', stderr)
+                self.assertEqual(Path(output).read_text(encoding='utf-8'), 'previous\n')
+
+    def test_duplicate_names_are_rejected(self):
+        duplicate = self.write('c/first.toml', 'secret = "z"\n')
+        output_dir = self.tmp / 'out'
+        for jobs in self.JOBS:
+            with self.subTest(jobs=jobs):
+                code, _, stderr = self.main(self.first, duplicate, '-o', str(output_dir),
+                                            '-j', jobs)
+                self.assertEqual(code, 1)
+                self.assertIn('distinct names', stderr)
+                self.assertFalse(output_dir.exists())
+
+    def test_jobs_must_be_positive(self):
+        for jobs in ('0', '-1'):
+            with self.subTest(jobs=jobs):
+                code, _, stderr = self.main(self.first, self.second, '-j', jobs)
+                self.assertEqual(code, 2)
+                self.assertIn('--jobs must be at least 1', stderr)
+
+    def test_missing_input(self):
+        missing = str(self.tmp / 'missing.toml')
+        for jobs in self.JOBS:
+            with self.subTest(jobs=jobs):
+                code, stdout, stderr = self.main(self.first, missing, '-j', jobs)
+                self.assertEqual(code, 1)
+                self.assertEqual(stdout, '')
+                self.assertIn(f'Input file not found: {missing}', stderr)
+
+    def test_failed_file_sets_exit_code(self):
+        broken = self.write('c/broken.toml', b'password = "x"\n\xff\n')
+        for jobs in self.JOBS:
+            with self.subTest(jobs=jobs):
+                output_dir = self.tmp / f'out{jobs}'
+                code, _, stderr = self.main(self.first, broken, self.second,
+                                            '-o', str(output_dir), '-j', jobs)
+                self.assertEqual(code, 1)
+                self.assertIn('Error processing file', stderr)
+                self.assertEqual(sorted(p.name for p in output_dir.iterdir()),
+                                 ['first.toml', 'second.toml'])
+
+
+if __name__ == '__main__':
+    unittest.main()
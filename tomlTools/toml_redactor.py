@@ -4,35 +4,111 @@ TOML Redactor Utility
 Redacts sensitive data (passwords, keys, tokens) from TOML configuration files.
 """
 
+import io
+import mmap
+import os
 import re
+import shutil
 import sys
+import tempfile
 import argparse
+import multiprocessing
+from contextlib import nullcontext, redirect_stderr, redirect_stdout
 from pathlib import Path
-from typing import Set
+from typing import (IO, Any, Callable, ContextManager, Dict, Final, Iterator, List, Match,
+                    Optional, Tuple)
+
+
+# Buffer size for file I/O; larger buffers mean fewer read/write syscalls
+_IO_BUFFER_SIZE = 1 << 20
+
+# TOML key name, including dotted keys with quotes like: properties."moesifKey"
+_KEY_PATTERN = r'[a-zA-Z_][a-zA-Z0-9_.-]*(?:\."[^"\n]*")*'
+
+# TOML key-value pairs (key = "value", key = 'value' or key = value) across a
+# block of lines, used to redact a whole block in one sub() pass. A rewritten
+# line always ends in a newline, so the trailing newline is part of the match.
+_PAIR_PATTERN = r'(?P<key>' + _KEY_PATTERN + r')[^\S\n]*=(?P<value>.+)$\n?'
+_BLOCK_RE = re.compile(r'^(?P<indent>[^\S\n]*)' + _PAIR_PATTERN, re.MULTILINE)
+# Same, but also matching whole comment lines so they can be removed
+_BLOCK_WITH_COMMENTS_RE = re.compile(
+    r'^(?P<indent>[^\S\n]*)(?:#.*\n?|' + _PAIR_PATTERN + ')', re.MULTILINE)
+
+# Translation table that drops quote characters from dotted keys
+_QUOTE_STRIP = str.maketrans('', '', '"\'')
+
+# Integer and float literals, checked without raising from float()
+_NUM_RE = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$', re.ASCII)
+
+
+def _copy_mode(target: Path, tmp_path: str) -> None:
+    """
+    Give a temporary output file the permissions its target should end up with.
+
+    Temporary files are created owner-only, so they take the mode of the file
+    they replace, or the usual mode for a new file under the current umask.
+    """
+    if os.path.exists(target):
+        shutil.copymode(target, tmp_path)
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+
+
+def _read_blocks(input_path: Path) -> Iterator[str]:
+    """
+    Yield a UTF-8 file as blocks of whole lines, read through a memory map.
+
+    Blocks are roughly _IO_BUFFER_SIZE bytes and end on a line break, so no
+    copy of the whole file is held in memory. CRLF and lone CR line endings
+    are normalized to LF as text mode's universal newlines do; a block never
+    ends between the CR and LF of a CRLF, since it always ends on LF. Files
+    that cannot be mapped (empty files, pipes) are read in text mode instead.
+    """
+    with open(input_path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+            while True:
+                lines = text.readlines(_IO_BUFFER_SIZE)
+                if not lines:
+                    return
+                yield ''.join(lines).replace('\r\n', '\n').replace('\r', '\n')
+        with mm:
+            size = len(mm)
+            start = 0
+            while start < size:
+                # Extend each block to the end of its last line; a UTF-8
+                # sequence never contains a newline byte, so this is safe
+                end = mm.find(b'\n', min(start + _IO_BUFFER_SIZE, size) - 1) + 1 or size
+                yield mm[start:end].decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+                start = end
 
 
 class TOMLRedactor:
     """Redacts sensitive information from TOML files."""
 
     # Sensitive field patterns to redact
-    SENSITIVE_PATTERNS = {
+    SENSITIVE_PATTERNS: Final = (
         'password', 'passwd', 'pwd',
         'key', 'apikey', 'api_key', 'secret',
         'auth_token', 'access_token', 'refresh_token', 'bearer_token',
         'credential', 'credentials',
         'key_password',
         'moesifkey', 'embedding_endpoint_key'
-    }
+    )
 
     # More specific token patterns (must match exactly or be at word boundaries)
-    TOKEN_PATTERNS = [
+    TOKEN_PATTERNS: Final = [
         r'\btoken\b',  # standalone 'token'
         r'_token$',    # ending with '_token'
         r'^token_',    # starting with 'token_'
     ]
 
     # Configuration key patterns that should NOT be redacted (even if they contain sensitive terms)
-    CONFIG_EXCLUDE_PATTERNS = [
+    CONFIG_EXCLUDE_PATTERNS: Final = [
         # Boolean/toggle settings
         r'^allow_',
         r'^enable_',
@@ -63,17 +139,34 @@ class TOMLRedactor:
         r'_endpoint$',  # URLs/endpoints (e.g., token_endpoint)
     ]
 
-    # Additional patterns for values that look sensitive
-    VALUE_PATTERNS = [
-        # JWT tokens
-        r'eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]*\.[A-Za-z0-9_-]*',
+    # JWT tokens, which may appear anywhere within a value
+    JWT_PATTERN: Final = r'eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]*\.[A-Za-z0-9_-]*'
+
+    # Additional patterns for values that look sensitive.
+    # These must match the whole value, so both ends are anchored.
+    VALUE_PATTERNS: Final = [
         # Base64 encoded credentials (long strings)
-        r'^[A-Za-z0-9+/]{40,}={0,2}$',
+        r'^[A-Za-z0-9+/]{40,}={0,2}\Z',
         # API keys starting with common prefixes
-        r'^sk-[A-Za-z0-9_-]{20,}',  # OpenAI style
-        r'^[A-Za-z0-9]{32,}$',  # Generic long alphanumeric
+        r'^sk-[A-Za-z0-9_-]{20,}.*\Z',  # OpenAI style
+        r'^[A-Za-z0-9]{32,}\Z',  # Generic long alphanumeric
     ]
 
+    # Compiled once so per-line matching skips the re module's pattern cache.
+    # Key patterns are fused into single alternations so each key is checked
+    # with one regex call instead of a Python loop over every pattern.
+    # Bare TOML keys are ASCII, so ASCII matching keeps \b checks off the Unicode tables.
+    _EXCLUDE_RE = re.compile('(?:' + ')|(?:'.join(CONFIG_EXCLUDE_PATTERNS) + ')', re.ASCII)
+    _SENSITIVE_RE = re.compile('(?:' + ')|(?:'.join(
+        [re.escape(p) for p in SENSITIVE_PATTERNS] + TOKEN_PATTERNS) + ')', re.ASCII)
+    _JWT_RE = re.compile(JWT_PATTERN, re.ASCII)
+    _VALUE_RE = re.compile('|'.join(f'(?:{p})' for p in VALUE_PATTERNS), re.ASCII | re.DOTALL)
+
+    # Shortest value any value pattern can match (a bare JWT "eyJ..")
+    _VALUE_MIN_LENGTH = 5
+    # Shortest value the VALUE_PATTERNS without an sk- prefix can match
+    _LONG_VALUE_LENGTH = 32
+
     def __init__(self, redaction_text: str = "***REDACTED***",
                  check_values: bool = True,
                  preserve_commented: bool = True,
@@ -88,38 +181,46 @@ class TOMLRedactor:
             remove_comments: Remove all comments from the output
         """
         self.redaction_text = redaction_text
+        # Quoted replacement values, built once rather than per redacted line
+        self._redacted_dq = f'"{redaction_text}"'
+        self._redacted_sq = f"'{redaction_text}'"
         self.check_values = check_values
         self.preserve_commented = preserve_commented
         self.remove_comments = remove_comments
+        # Pick the value check and block pattern once instead of testing the
+        # options on every line
+        self._value_check: Callable[[str], bool] = \
+            self._value_looks_sensitive if check_values else self._never_sensitive
+        self._block_re = _BLOCK_WITH_COMMENTS_RE if remove_comments else _BLOCK_RE
         self.redacted_count = 0
-        self.redacted_lines: Set[int] = set()
+        # Lines are processed in order, so appended line numbers stay sorted
+        self.redacted_lines: List[int] = []
 
     def is_sensitive_key(self, key: str) -> bool:
         """Check if a key name indicates sensitive data."""
         # Remove quotes from dotted keys like properties."moesifKey"
-        key_clean = re.sub(r'["\']', '', key).lower()
+        key_clean = key.translate(_QUOTE_STRIP).lower()
 
         # First check if this key matches configuration exclude patterns
-        for pattern in self.CONFIG_EXCLUDE_PATTERNS:
-            if re.search(pattern, key_clean):
-                return False
-
-        # Check simple patterns
-        if any(pattern in key_clean for pattern in self.SENSITIVE_PATTERNS):
-            return True
-
-        # Check specific token patterns
-        for pattern in self.TOKEN_PATTERNS:
-            if re.search(pattern, key_clean):
-                return True
+        if self._EXCLUDE_RE.search(key_clean):
+            return False
 
-        return False
+        # Check simple patterns and specific token patterns
+        return bool(self._SENSITIVE_RE.search(key_clean))
 
     def is_sensitive_value(self, value: str) -> bool:
         """Check if a value appears to contain sensitive data."""
         if not self.check_values:
             return False
+        return self._value_looks_sensitive(value)
 
+    @staticmethod
+    def _never_sensitive(value: str) -> bool:
+        """Value check used when check_values is disabled."""
+        return False
+
+    def _value_looks_sensitive(self, value: str) -> bool:
+        """Match a value against the value patterns, regardless of check_values."""
         # Remove quotes if present
         clean_value = value.strip().strip('"\'')
 
@@ -133,23 +234,26 @@ class TOMLRedactor:
            (clean_value.startswith('{$') and clean_value.endswith('}')):
             return False
 
-        # Skip boolean values
-        if clean_value.lower() in ('true', 'false'):
+        # Skip values too short to match any value pattern
+        if len(clean_value) < self._VALUE_MIN_LENGTH:
+            return False
+
+        # JWTs can be embedded, so they need a search; the literal prefix
+        # check avoids running it on values that cannot contain one
+        if 'eyJ' in clean_value and self._JWT_RE.search(clean_value):
+            return True
+
+        # The remaining patterns need a long value or an sk- prefix, which
+        # also rules out booleans
+        if len(clean_value) < self._LONG_VALUE_LENGTH and not clean_value.startswith('sk-'):
             return False
 
         # Skip numeric values
-        try:
-            float(clean_value)
+        if _NUM_RE.match(clean_value):
             return False
-        except ValueError:
-            pass
 
         # Check against value patterns
-        for pattern in self.VALUE_PATTERNS:
-            if re.search(pattern, clean_value):
-                return True
-
-        return False
+        return self._VALUE_RE.fullmatch(clean_value) is not None
 
     def redact_line(self, line: str, line_num: int) -> str:
         """
@@ -162,60 +266,81 @@ class TOMLRedactor:
         Returns:
             Redacted line
         """
-        # Handle empty lines and comments
-        stripped = line.lstrip()
-        if not stripped:
-            return line
-
-        # Remove comments if configured
-        if stripped.startswith('#'):
-            if self.remove_comments:
-                return ''  # Remove the entire comment line
-            elif self.preserve_commented:
-                return line  # Keep comment as-is
-            # If preserve_commented is False but remove_comments is also False,
-            # we still keep the comment (preserve_commented only affects redaction of commented lines)
-            return line
+        # Classified by the same pattern redact_file uses for whole blocks
+        return self._redact_block(line, line_num)
 
-        # Match TOML key-value pairs
-        # Pattern: key = "value" or key = 'value' or key = value
-        # Also handles dotted keys with quotes like: properties."moesifKey"
-        match = re.match(r'^(\s*)([a-zA-Z_][a-zA-Z0-9_.-]*(?:\."[^"]*")*)\s*=\s*(.+)$', line)
-
-        if not match:
-            return line
+    def _redact_pair(self, indent: str, key: str, value: str, line_num: int) -> Optional[str]:
+        """
+        Redact a single key-value pair.
 
-        indent, key, value = match.groups()
+        Args:
+            indent: Leading whitespace of the line
+            key: The key name
+            value: The raw value text
+            line_num: Line number for tracking
 
+        Returns:
+            Redacted line, or None if the pair is kept as-is
+        """
         # Skip if value is already redacted
         value_stripped = value.strip().strip('"\'')
         if value_stripped == self.redaction_text:
-            return line
+            return None
 
         # Skip if value is a variable reference (even if key is sensitive)
         # Matches: $var, ${var}, {$var}
         if value_stripped.startswith('$') or value_stripped.startswith('${') or \
            (value_stripped.startswith('{$') and value_stripped.endswith('}')):
-            return line
+            return None
 
         # Check if key or value is sensitive
-        if self.is_sensitive_key(key) or self.is_sensitive_value(value):
+        if self.is_sensitive_key(key) or self._value_check(value):
             # Preserve the quote style if present
             value_stripped = value.strip()
-            if value_stripped.startswith('"') and value_stripped.endswith('"'):
-                redacted_value = f'"{self.redaction_text}"'
-            elif value_stripped.startswith("'") and value_stripped.endswith("'"):
-                redacted_value = f"'{self.redaction_text}'"
+            if value_stripped.startswith("'") and value_stripped.endswith("'"):
+                redacted_value = self._redacted_sq
             else:
-                redacted_value = f'"{self.redaction_text}"'
+                redacted_value = self._redacted_dq
 
             self.redacted_count += 1
-            self.redacted_lines.add(line_num)
+            self.redacted_lines.append(line_num)
             return f'{indent}{key} = {redacted_value}\n'
 
-        return line
+        return None
 
-    def redact_file(self, input_path: Path, output_path: Path = None) -> bool:
+    def _redact_block(self, block: str, first_line: int) -> str:
+        """
+        Redact a block of whole lines in a single regex pass.
+
+        The regex engine finds the key-value pairs, so only those reach
+        Python. Blank lines, table headers and comments are kept as-is,
+        except that comments are dropped when remove_comments is set.
+
+        Args:
+            block: Lines to process
+            first_line: Line number of the first line in the block
+
+        Returns:
+            Redacted block
+        """
+        line_num = first_line
+        counted = 0
+        redact_pair = self._redact_pair
+
+        def replace(match: Match[str]) -> str:
+            nonlocal line_num, counted
+            start = match.start()
+            line_num += block.count('\n', counted, start)
+            counted = start
+            key = match.group('key')
+            if key is None:
+                return ''  # Remove the entire comment line
+            redacted = redact_pair(match.group('indent'), key, match.group('value'), line_num)
+            return match.group(0) if redacted is None else redacted
+
+        return self._block_re.sub(replace, block)
+
+    def redact_file(self, input_path: Path, output_path: Optional[Path] = None) -> bool:
         """
         Redact sensitive data from a TOML file.
 
@@ -226,24 +351,33 @@ class TOMLRedactor:
         Returns:
             True if successful, False otherwise
         """
+        tmp_path: Optional[str] = None
         try:
-            with open(input_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-
-            redacted_lines = []
-            for line_num, line in enumerate(lines, start=1):
-                redacted_line = self.redact_line(line, line_num)
-                redacted_lines.append(redacted_line)
-
-            output_content = ''.join(redacted_lines)
-
+            out: ContextManager[IO[str]]
             if output_path:
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(output_content)
+                # Stream into a temporary file beside the output and move it into
+                # place once the whole input has been read, so a failed run never
+                # leaves the target truncated and in-place redaction is safe
+                out = tempfile.NamedTemporaryFile(
+                    'w', encoding='utf-8', buffering=_IO_BUFFER_SIZE, dir=output_path.parent,
+                    prefix=f'.{output_path.name}.', suffix='.tmp', delete=False)
+                tmp_path = out.name
+            else:
+                out = nullcontext(sys.stdout)
+            with out as fout:
+                line_num = 1
+                for block in _read_blocks(input_path):
+                    fout.write(self._redact_block(block, line_num))
+                    line_num += block.count('\n')
+
+            if output_path and tmp_path:
+                _copy_mode(output_path, tmp_path)
+                os.replace(tmp_path, output_path)
+                tmp_path = None
                 print(f"Redacted {self.redacted_count} sensitive fields")
                 print(f"Output written to: {output_path}")
             else:
-                print(output_content)
+                print()
                 print(f"\n# Redacted {self.redacted_count} sensitive fields", file=sys.stderr)
 
             return True
@@ -252,17 +386,58 @@ class TOMLRedactor:
             print(f"Error processing file: {e}", file=sys.stderr)
             return False
 
+        finally:
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
     def get_report(self) -> str:
         """Generate a redaction report."""
         if not self.redacted_lines:
             return "No sensitive data found."
 
-        lines_str = ', '.join(map(str, sorted(self.redacted_lines)))
+        lines_str = ', '.join(map(str, self.redacted_lines))
         return (f"Redacted {self.redacted_count} sensitive fields\n"
                 f"Lines modified: {lines_str}")
 
 
-def main():
+# Batch job: input path, output path (None for stdout), TOMLRedactor options, report flag,
+# and the batch's temporary directory for captured stdout
+_Job = Tuple[Path, Optional[Path], Dict[str, Any], bool, str]
+
+
+def _redact_worker(job: _Job) -> Tuple[Path, bool, str, str]:
+    """
+    Redact one file of a batch, capturing its console output.
+
+    Runs in a worker process. Stdout, which holds the whole redacted file
+    when there is no output directory, is streamed to a file in the batch's
+    temporary directory so it is never held in memory; the parent copies it
+    out in input order and removes the directory when the batch ends, however
+    it ends. Stderr only carries short status lines and is returned as a
+    string.
+
+    Args:
+        job: Batch job describing the file to redact
+
+    Returns:
+        Input path, success flag, temporary stdout file path and captured stderr
+    """
+    input_path, output_path, options, report, tmp_dir = job
+    redactor = TOMLRedactor(**options)
+    stderr = io.StringIO()
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', buffering=_IO_BUFFER_SIZE,
+                                     dir=tmp_dir, suffix='.toml', delete=False) as stdout:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            success = redactor.redact_file(input_path, output_path)
+            if report:
+                print("\n" + redactor.get_report(), file=sys.stderr)
+    return input_path, success, stdout.name, stderr.getvalue()
+
+
+def main() -> None:
     parser = argparse.ArgumentParser(
         description='Redact sensitive data from TOML configuration files',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -279,12 +454,16 @@ Examples:
 
   # Only redact based on key names, not value patterns
   %(prog)s deployment.toml --no-check-values
+
+  # Redact several files in parallel into a directory
+  %(prog)s conf/*.toml -o redacted/ --jobs 4
         """
     )
 
-    parser.add_argument('input', type=str, help='Input TOML file path')
+    parser.add_argument('input', type=str, nargs='+', help='Input TOML file path(s)')
     parser.add_argument('-o', '--output', type=str,
-                       help='Output file path (default: stdout)')
+                       help='Output file path, or output directory when several inputs '
+                            'are given (default: stdout)')
     parser.add_argument('-r', '--redaction-text', type=str,
                        default='***REDACTED***',
                        help='Text to replace sensitive values with (default: ***REDACTED***)')
@@ -296,27 +475,73 @@ Examples:
                        help='Remove all comment lines from output')
     parser.add_argument('--report', action='store_true',
                        help='Print detailed redaction report')
+    parser.add_argument('-j', '--jobs', type=int,
+                       help='Number of worker processes when redacting several files '
+                            '(default: number of CPUs)')
 
     args = parser.parse_args()
 
-    input_path = Path(args.input)
-    if not input_path.exists():
-        print(f"Error: Input file not found: {input_path}", file=sys.stderr)
-        sys.exit(1)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
 
-    output_path = Path(args.output) if args.output else None
+    input_paths = [Path(p) for p in args.input]
+    for input_path in input_paths:
+        if not input_path.exists():
+            print(f"Error: Input file not found: {input_path}", file=sys.stderr)
+            sys.exit(1)
 
-    redactor = TOMLRedactor(
-        redaction_text=args.redaction_text,
-        check_values=not args.no_check_values,
-        preserve_commented=not args.include_comments,
-        remove_comments=args.remove_comments
-    )
-
-    success = redactor.redact_file(input_path, output_path)
+    options = {
+        'redaction_text': args.redaction_text,
+        'check_values': not args.no_check_values,
+        'preserve_commented': not args.include_comments,
+        'remove_comments': args.remove_comments,
+    }
 
-    if args.report:
-        print("\n" + redactor.get_report(), file=sys.stderr)
+    if len(input_paths) == 1:
+        output_path = Path(args.output) if args.output else None
+
+        redactor = TOMLRedactor(**options)
+
+        success = redactor.redact_file(input_paths[0], output_path)
+
+        if args.report:
+            print("\n" + redactor.get_report(), file=sys.stderr)
+
+        sys.exit(0 if success else 1)
+
+    # Batch mode: each file is written to the output directory under its own name
+    output_dir = Path(args.output) if args.output else None
+    if output_dir:
+        if output_dir.exists() and not output_dir.is_dir():
+            print(f"Error: Output must be a directory for multiple inputs: {output_dir}",
+                  file=sys.stderr)
+            sys.exit(1)
+        names = [p.name for p in input_paths]
+        if len(set(names)) != len(names):
+            print("Error: Input files must have distinct names when writing to a directory",
+                  file=sys.stderr)
+            sys.exit(1)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    processes = min(args.jobs or os.cpu_count() or 1, len(input_paths))
+
+    success = True
+    # Captured stdout files live in one directory that is removed even when
+    # the batch is cut short by an error, a closed pipe or Ctrl-C
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            multiprocessing.Pool(processes) if processes > 1 else nullcontext() as pool:
+        jobs = [(p, output_dir / p.name if output_dir else None, options, args.report, tmp_dir)
+                for p in input_paths]
+        # imap keeps results in input order while later files are still being redacted
+        results = pool.imap(_redact_worker, jobs) if pool else map(_redact_worker, jobs)
+        for input_path, ok, stdout_path, stderr in results:
+            if not output_dir:
+                print(f"# File: {input_path}")
+            with open(stdout_path, 'r', encoding='utf-8') as captured:
+                shutil.copyfileobj(captured, sys.stdout, _IO_BUFFER_SIZE)
+            sys.stdout.flush()
+            sys.stderr.write(stderr)
+            success = success and ok
 
     sys.exit(0 if success else 1)
 